@@ -1,42 +1,87 @@
 # Improved POS app with working SQLite database
 # To run: pip install streamlit pandas
 # Then: streamlit run code.py
+# Optional: pip install orjson (faster JSON for stored records)
 
 import streamlit as st
 import json
 import sqlite3
-from datetime import datetime
-import pandas as pd
+from datetime import datetime, timedelta
 from contextlib import contextmanager
 from uuid import uuid4
+from types import MappingProxyType
 import os
+import threading
+
+try:
+    import orjson
+
+    def _dumps(obj):
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode()
+
+    _loads = orjson.loads
+except ImportError:
+    _dumps = json.dumps
+    _loads = json.loads
 
 # ============== DATABASE SETUP ==============
 
 DB_NAME = os.environ.get("POS_DB", "pos_system.db")
 
-@contextmanager
-def get_db():
-    conn = sqlite3.connect(DB_NAME, check_same_thread=False)
+@st.cache_resource
+def get_connection(path):
+    conn = sqlite3.connect(path, check_same_thread=False, cached_statements=256, isolation_level=None)
     conn.row_factory = sqlite3.Row
     # enforce foreign keys
     conn.execute("PRAGMA foreign_keys = ON;")
-    try:
-        yield conn
-    finally:
-        conn.commit()
-        conn.close()
+    conn.execute("PRAGMA journal_mode = WAL;")
+    conn.execute("PRAGMA synchronous = NORMAL;")
+    conn.execute("PRAGMA temp_store = MEMORY;")
+    conn.execute("PRAGMA cache_size = -64000;")
+    conn.execute("PRAGMA mmap_size = 268435456;")
+    # refresh stale planner statistics (newer sqlite checks every table on open)
+    conn.execute("PRAGMA optimize = 0x10002;")
+    return conn
+
+@st.cache_resource
+def get_db_lock(path):
+    return threading.RLock()
+
+@contextmanager
+def get_db():
+    # one shared connection per database file; sessions take turns on it
+    conn = get_connection(DB_NAME)
+    with get_db_lock(DB_NAME):
+        # autocommit connection: single statements commit on their own, these
+        # only settle an explicit BEGIN left open by a multi-statement write
+        try:
+            yield conn
+        except Exception:
+            conn.rollback()
+            raise
+        else:
+            conn.commit()
+
+def iter_rows(sql, params=()):
+    with get_db() as conn:
+        for row in conn.execute(sql, params):
+            yield dict(row)
+
+def today_range():
+    today = datetime.now().date()
+    return today.isoformat(), (today + timedelta(days=1)).isoformat()
+
+def days_ago(days):
+    return (datetime.utcnow().date() - timedelta(days=int(days))).isoformat()
 
 def init_database():
     with get_db() as conn:
         cursor = conn.cursor()
-        cursor.execute("""
+        cursor.executescript("""
             CREATE TABLE IF NOT EXISTS config (
                 id INTEGER PRIMARY KEY,
                 data TEXT NOT NULL
-            )
-        """)
-        cursor.execute("""
+            );
             CREATE TABLE IF NOT EXISTS products (
                 id TEXT PRIMARY KEY,
                 name TEXT NOT NULL,
@@ -45,9 +90,7 @@ def init_database():
                 category TEXT,
                 data TEXT,
                 created_at TEXT DEFAULT (datetime('now'))
-            )
-        """)
-        cursor.execute("""
+            );
             CREATE TABLE IF NOT EXISTS customers (
                 id TEXT PRIMARY KEY,
                 name TEXT NOT NULL,
@@ -58,9 +101,7 @@ def init_database():
                 order_count INTEGER DEFAULT 0,
                 data TEXT,
                 created_at TEXT DEFAULT (datetime('now'))
-            )
-        """)
-        cursor.execute("""
+            );
             CREATE TABLE IF NOT EXISTS transactions (
                 id TEXT PRIMARY KEY,
                 customer_id TEXT,
@@ -73,9 +114,7 @@ def init_database():
                 data TEXT,
                 timestamp TEXT DEFAULT (datetime('now')),
                 FOREIGN KEY(customer_id) REFERENCES customers(id) ON DELETE SET NULL
-            )
-        """)
-        cursor.execute("""
+            );
             CREATE TABLE IF NOT EXISTS transaction_items (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 transaction_id TEXT NOT NULL,
@@ -85,68 +124,154 @@ def init_database():
                 quantity INTEGER NOT NULL,
                 data TEXT,
                 FOREIGN KEY (transaction_id) REFERENCES transactions(id) ON DELETE CASCADE
-            )
+            );
+            CREATE INDEX IF NOT EXISTS idx_transaction_items_transaction ON transaction_items(transaction_id);
+            CREATE INDEX IF NOT EXISTS idx_transactions_timestamp ON transactions(timestamp);
+            CREATE INDEX IF NOT EXISTS idx_transactions_customer ON transactions(customer_id);
+            CREATE INDEX IF NOT EXISTS idx_products_cover ON products(name COLLATE NOCASE, id, price, inventory, category);
+            CREATE INDEX IF NOT EXISTS idx_customers_cover ON customers(name COLLATE NOCASE, id, email, phone, loyalty_points, total_spend, order_count);
         """)
         conn.commit()
 
+# schema setup only needs to run once per database file, not on every rerun
+@st.cache_resource(show_spinner=False)
+def ensure_database(path):
+    init_database()
+    return True
+
+# the connection lives as long as the process, so re-check planner statistics
+# hourly; sqlite analyzes the tables whose recent queries would benefit
+@st.cache_data(ttl=3600, show_spinner=False)
+def optimize_database(path):
+    with get_db() as conn:
+        conn.execute("PRAGMA optimize;")
+    return True
+
 # ============== DATABASE OPERATIONS ==============
 
+def _extra_json(record, fields):
+    # typed columns hold the known fields; only keep a blob for anything else
+    extra = {k: v for k, v in record.items() if k not in fields}
+    return _dumps(extra) if extra else None
+
+def _with_extra(row):
+    record = dict(row)
+    extra = record.pop('data', None)
+    return {**_loads(extra), **record} if extra else record
+
 class ConfigDB:
     @staticmethod
+    @st.cache_data(ttl=300, show_spinner=False)
     def get():
         with get_db() as conn:
             row = conn.execute("SELECT data FROM config WHERE id = 1").fetchone()
-            return json.loads(row["data"]) if row else None
+            return _loads(row["data"]) if row else None
 
     @staticmethod
     def save(config_data):
         with get_db() as conn:
             conn.execute(
                 "INSERT OR REPLACE INTO config (id, data) VALUES (1, ?)",
-                (json.dumps(config_data),)
+                (_dumps(config_data),)
             )
             conn.commit()
+        ConfigDB.get.clear()
 
 class ProductDB:
+    COLUMNS = "id, name, price, inventory, COALESCE(NULLIF(category, ''), 'General') AS category"
+    FIELDS = {'id', 'name', 'price', 'inventory', 'category'}
+
     @staticmethod
-    def _row_to_product(row):
-        product = json.loads(row['data']) if row['data'] else {}
-        product.update({
-            'id': row['id'],
-            'name': row['name'],
-            'price': row['price'],
-            'inventory': row['inventory'],
-            'category': row['category'] or 'General'
-        })
-        return product
+    def clear_cache():
+        ProductDB.get_all.clear()
+        ProductDB.search.clear()
+        ProductDB.get_categories.clear()
+        ProductDB.count.clear()
+        ProductDB.get_stock_alerts.clear()
 
     @staticmethod
+    @st.cache_data(show_spinner=False)
     def get_all():
+        return list(iter_rows(f"SELECT {ProductDB.COLUMNS} FROM products ORDER BY name COLLATE NOCASE"))
+
+    @staticmethod
+    @st.cache_data(max_entries=64, show_spinner=False)
+    def search(query):
+        pattern = '%' + query.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+        return list(iter_rows(
+            f"SELECT {ProductDB.COLUMNS} FROM products WHERE name LIKE ? ESCAPE '\\' ORDER BY name COLLATE NOCASE",
+            (pattern,)
+        ))
+
+    @staticmethod
+    @st.cache_data(show_spinner=False)
+    def count():
         with get_db() as conn:
-            results = conn.execute("SELECT * FROM products ORDER BY name COLLATE NOCASE").fetchall()
-            return [ProductDB._row_to_product(r) for r in results]
+            return conn.execute("SELECT COUNT(*) FROM products").fetchone()[0]
+
+    @staticmethod
+    @st.cache_data(show_spinner=False)
+    def get_categories():
+        return [r['category'] for r in iter_rows("SELECT DISTINCT COALESCE(NULLIF(category, ''), 'General') AS category FROM products ORDER BY 1")]
+
+    @staticmethod
+    @st.cache_data(show_spinner=False)
+    def get_stock_alerts(threshold, limit=3):
+        rows = iter_rows("""
+            SELECT name, inventory, is_out, cnt FROM (
+                SELECT name, inventory, inventory <= 0 AS is_out,
+                       COUNT(*) OVER (PARTITION BY inventory <= 0) AS cnt,
+                       ROW_NUMBER() OVER (PARTITION BY inventory <= 0 ORDER BY name COLLATE NOCASE) AS rn
+                FROM products WHERE inventory <= ?
+            ) WHERE rn <= ?
+        """, (int(threshold), int(limit)))
+        alerts = {'out': [], 'out_count': 0, 'low': [], 'low_count': 0}
+        for r in rows:
+            kind = 'out' if r['is_out'] else 'low'
+            alerts[kind].append({'name': r['name'], 'inventory': r['inventory']})
+            alerts[f'{kind}_count'] = r['cnt']
+        return alerts
 
     @staticmethod
     def get_by_id(product_id):
         with get_db() as conn:
-            row = conn.execute("SELECT * FROM products WHERE id = ?", (product_id,)).fetchone()
-            return ProductDB._row_to_product(row) if row else None
+            row = conn.execute(f"SELECT {ProductDB.COLUMNS}, data FROM products WHERE id = ?", (product_id,)).fetchone()
+            return _with_extra(row) if row else None
+
+    @staticmethod
+    def _insert_params(product_data):
+        pdata = dict(product_data)
+        pdata.setdefault('category', 'General')
+        pdata.setdefault('inventory', 0)
+        pdata.setdefault('price', 0.0)
+        pid = pdata.get('id') or str(uuid4())
+        pdata['id'] = pid
+        return (pid, pdata['name'], float(pdata['price']), int(pdata['inventory']), pdata['category'], _extra_json(pdata, ProductDB.FIELDS))
 
     @staticmethod
     def add(product_data):
         with get_db() as conn:
-            pdata = dict(product_data)
-            pdata.setdefault('category', 'General')
-            pdata.setdefault('inventory', 0)
-            pdata.setdefault('price', 0.0)
-            pid = pdata.get('id') or str(uuid4())
-            pdata['id'] = pid
+            params = ProductDB._insert_params(product_data)
             conn.execute(
                 "INSERT INTO products (id, name, price, inventory, category, data) VALUES (?, ?, ?, ?, ?, ?)",
-                (pid, pdata['name'], float(pdata['price']), int(pdata['inventory']), pdata['category'], json.dumps(pdata))
+                params
+            )
+            conn.commit()
+        ProductDB.clear_cache()
+        return params[0]
+
+    @staticmethod
+    def add_many(products):
+        rows = [ProductDB._insert_params(p) for p in products]
+        with get_db() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.executemany(
+                "INSERT INTO products (id, name, price, inventory, category, data) VALUES (?, ?, ?, ?, ?, ?)",
+                rows
             )
             conn.commit()
-            return pid
+        ProductDB.clear_cache()
+        return [r[0] for r in rows]
 
     @staticmethod
     def update(product_data):
@@ -155,55 +280,84 @@ class ProductDB:
             conn.execute(
                 "UPDATE products SET name = ?, price = ?, inventory = ?, category = ?, data = ? WHERE id = ?",
                 (pdata['name'], float(pdata['price']), int(pdata.get('inventory', 0)), pdata.get('category', 'General'),
-                 json.dumps(pdata), pdata['id'])
+                 _extra_json(pdata, ProductDB.FIELDS), pdata['id'])
             )
             conn.commit()
+        ProductDB.clear_cache()
 
     @staticmethod
     def delete(product_id):
         with get_db() as conn:
             conn.execute("DELETE FROM products WHERE id = ?", (product_id,))
             conn.commit()
+        ProductDB.clear_cache()
 
     @staticmethod
     def update_inventory(product_id, quantity_change):
         with get_db() as conn:
             conn.execute("UPDATE products SET inventory = inventory + ? WHERE id = ?", (int(quantity_change), product_id))
             conn.commit()
+        ProductDB.clear_cache()
 
 class CustomerDB:
+    COLUMNS = "id, name, email, phone, loyalty_points, total_spend, order_count"
+    FIELDS = {'id', 'name', 'email', 'phone', 'loyalty_points', 'total_spend', 'order_count'}
+
     @staticmethod
-    def _row_to_customer(row):
-        customer = json.loads(row['data']) if row['data'] else {}
-        customer.update({
-            'id': row['id'],
-            'name': row['name'],
-            'email': row['email'],
-            'phone': row['phone'],
-            'loyalty_points': row['loyalty_points'],
-            'total_spend': row['total_spend'],
-            'order_count': row['order_count'],
-        })
-        return customer
+    def clear_cache():
+        CustomerDB.get_all.clear()
+        CustomerDB.get_by_id.clear()
+        CustomerDB.names.clear()
 
     @staticmethod
+    @st.cache_data(show_spinner=False)
     def get_all():
+        return list(iter_rows(f"SELECT {CustomerDB.COLUMNS} FROM customers ORDER BY name COLLATE NOCASE"))
+
+    @staticmethod
+    @st.cache_data(show_spinner=False)
+    def get_by_id(customer_id):
         with get_db() as conn:
-            rows = conn.execute("SELECT * FROM customers ORDER BY name COLLATE NOCASE").fetchall()
-            return [CustomerDB._row_to_customer(r) for r in rows]
+            row = conn.execute(f"SELECT {CustomerDB.COLUMNS}, data FROM customers WHERE id = ?", (customer_id,)).fetchone()
+            return _with_extra(row) if row else None
+
+    @staticmethod
+    @st.cache_data(show_spinner=False)
+    def names():
+        with get_db() as conn:
+            return [tuple(r) for r in conn.execute("SELECT id, name FROM customers ORDER BY name COLLATE NOCASE")]
+
+    @staticmethod
+    def _insert_params(customer_data):
+        cdata = dict(customer_data)
+        cid = cdata.get('id') or str(uuid4())
+        cdata['id'] = cid
+        return (cid, cdata['name'], cdata.get('email', ''), cdata.get('phone', ''), 0, 0.0, 0, _extra_json(cdata, CustomerDB.FIELDS))
 
     @staticmethod
     def add(customer_data):
         with get_db() as conn:
-            cdata = dict(customer_data)
-            cid = cdata.get('id') or str(uuid4())
-            cdata['id'] = cid
+            params = CustomerDB._insert_params(customer_data)
             conn.execute(
                 "INSERT INTO customers (id, name, email, phone, loyalty_points, total_spend, order_count, data) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
-                (cid, cdata['name'], cdata.get('email', ''), cdata.get('phone', ''), 0, 0.0, 0, json.dumps(cdata))
+                params
             )
             conn.commit()
-            return cid
+        CustomerDB.clear_cache()
+        return params[0]
+
+    @staticmethod
+    def add_many(customers):
+        rows = [CustomerDB._insert_params(c) for c in customers]
+        with get_db() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.executemany(
+                "INSERT INTO customers (id, name, email, phone, loyalty_points, total_spend, order_count, data) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+            conn.commit()
+        CustomerDB.clear_cache()
+        return [r[0] for r in rows]
 
     @staticmethod
     def update(customer_data):
@@ -211,35 +365,38 @@ class CustomerDB:
             cdata = dict(customer_data)
             conn.execute(
                 "UPDATE customers SET name = ?, email = ?, phone = ?, data = ? WHERE id = ?",
-                (cdata['name'], cdata.get('email', ''), cdata.get('phone', ''), json.dumps(cdata), cdata['id'])
+                (cdata['name'], cdata.get('email', ''), cdata.get('phone', ''), _extra_json(cdata, CustomerDB.FIELDS), cdata['id'])
             )
             conn.commit()
+        CustomerDB.clear_cache()
 
     @staticmethod
     def delete(customer_id):
         with get_db() as conn:
             conn.execute("DELETE FROM customers WHERE id = ?", (customer_id,))
             conn.commit()
+        CustomerDB.clear_cache()
 
+class TransactionDB:
     @staticmethod
-    def update_stats(customer_id, total_spent, loyalty_points):
-        with get_db() as conn:
-            conn.execute(
-                "UPDATE customers SET total_spend = total_spend + ?, loyalty_points = loyalty_points + ?, order_count = order_count + 1 WHERE id = ?",
-                (float(total_spent), int(loyalty_points), customer_id)
-            )
-            conn.commit()
+    def clear_cache():
+        TransactionDB.get_todays_summary.clear()
+        TransactionDB.get_stats.clear()
+        TransactionDB.get_payment_totals.clear()
+        get_top_products.clear()
 
-class TransactionDB:
     @staticmethod
-    def get_todays_total():
+    @st.cache_data(ttl=30, show_spinner=False)
+    def get_todays_summary():
         with get_db() as conn:
-            row = conn.execute("SELECT SUM(total) as total FROM transactions WHERE date(timestamp) = date('now', 'localtime')").fetchone()
-            return float(row['total']) if row and row['total'] is not None else 0.0
+            row = conn.execute("SELECT COALESCE(SUM(total), 0) as total, COUNT(*) as count FROM transactions WHERE timestamp >= ? AND timestamp < ?", today_range()).fetchone()
+            return {'total': float(row['total']), 'count': int(row['count'])}
 
     @staticmethod
-    def add(transaction_data):
+    def process_sale(transaction_data, update_inventory=True, loyalty_points=0):
+        # sale, line items, stock and customer stats commit together or not at all
         with get_db() as conn:
+            conn.execute("BEGIN IMMEDIATE")
             tid = transaction_data.get('id') or str(uuid4())
             timestamp = transaction_data.get('timestamp') or datetime.utcnow().isoformat()
             conn.execute(
@@ -247,39 +404,66 @@ class TransactionDB:
                 (tid, transaction_data.get('customer_id'), float(transaction_data['subtotal']),
                  float(transaction_data.get('discount', 0)), float(transaction_data.get('tax', 0)), float(transaction_data.get('tip', 0)),
                  float(transaction_data['total']), transaction_data.get('payment_method', 'Cash'),
-                 json.dumps(transaction_data), timestamp)
+                 _dumps(transaction_data), timestamp)
+            )
+            # ensure item fields are primitive types
+            item_rows = [
+                (tid, item.get('id'), item.get('name') or item.get('product_name') or 'Unknown',
+                 float(item.get('price', 0.0)), int(item.get('cartQuantity', item.get('quantity', 1))), _dumps(item))
+                for item in transaction_data.get('items', [])
+            ]
+            conn.executemany(
+                "INSERT INTO transaction_items (transaction_id, product_id, product_name, price, quantity, data) VALUES (?, ?, ?, ?, ?, ?)",
+                item_rows
             )
-            for item in transaction_data.get('items', []):
-                # ensure item fields are primitive types
-                pid = item.get('id')
-                pname = item.get('name') or item.get('product_name') or 'Unknown'
-                price = float(item.get('price', 0.0))
-                qty = int(item.get('cartQuantity', item.get('quantity', 1)))
+            if update_inventory:
+                stock_rows = [(int(i['cartQuantity']), i['id'], int(i['cartQuantity'])) for i in transaction_data.get('items', [])]
+                cursor = conn.executemany(
+                    "UPDATE products SET inventory = inventory - ? WHERE id = ? AND inventory >= ?",
+                    stock_rows
+                )
+                if cursor.rowcount != len(stock_rows):
+                    raise ValueError("Insufficient stock")
+            if transaction_data.get('customer_id'):
                 conn.execute(
-                    "INSERT INTO transaction_items (transaction_id, product_id, product_name, price, quantity, data) VALUES (?, ?, ?, ?, ?, ?)",
-                    (tid, pid, pname, price, qty, json.dumps(item))
+                    "UPDATE customers SET total_spend = total_spend + ?, loyalty_points = loyalty_points + ?, order_count = order_count + 1 WHERE id = ?",
+                    (float(transaction_data['total']), int(loyalty_points), transaction_data['customer_id'])
                 )
             conn.commit()
-            return tid
+        TransactionDB.clear_cache()
+        ProductDB.clear_cache()
+        CustomerDB.clear_cache()
+        return tid
 
     @staticmethod
+    @st.cache_data(ttl=30, show_spinner=False)
+    def get_payment_totals(days=30):
+        return [
+            {'payment_method': r['payment_method'], 'total': float(r['total'] or 0.0)}
+            for r in iter_rows(
+                "SELECT payment_method, SUM(total) as total FROM transactions WHERE timestamp >= ? GROUP BY payment_method ORDER BY 2 DESC",
+                (days_ago(days),)
+            )
+        ]
+
+    @staticmethod
+    @st.cache_data(ttl=30, show_spinner=False)
     def get_stats(days=30):
         with get_db() as conn:
-            row = conn.execute(
-                "SELECT COUNT(*) as count, SUM(total) as total_sales, AVG(total) as avg_sale FROM transactions WHERE date(timestamp) >= date('now', ?)",
-                (f'-{int(days)} days',)
-            ).fetchone()
-            items = conn.execute(
-                "SELECT SUM(ti.quantity) as total_items FROM transaction_items ti JOIN transactions t ON ti.transaction_id = t.id WHERE date(t.timestamp) >= date('now', ?)",
-                (f'-{int(days)} days',)
-            ).fetchone()
+            row = conn.execute("""
+                WITH recent AS (SELECT id, total FROM transactions WHERE timestamp >= ?)
+                SELECT COUNT(*) as count, SUM(total) as total_sales, AVG(total) as avg_sale,
+                       (SELECT SUM(ti.quantity) FROM transaction_items ti JOIN recent r ON ti.transaction_id = r.id) as total_items
+                FROM recent
+            """, (days_ago(days),)).fetchone()
             return {
                 'transaction_count': int(row['count']) if row and row['count'] is not None else 0,
                 'total_sales': float(row['total_sales']) if row and row['total_sales'] is not None else 0.0,
                 'avg_transaction': float(row['avg_sale']) if row and row['avg_sale'] is not None else 0.0,
-                'total_items_sold': int(items['total_items']) if items and items['total_items'] is not None else 0
+                'total_items_sold': int(row['total_items']) if row and row['total_items'] is not None else 0
             }
 
+@st.cache_data(ttl=30, show_spinner=False)
 def get_top_products(limit=5, days=None):
     with get_db() as conn:
         if days:
@@ -287,12 +471,12 @@ def get_top_products(limit=5, days=None):
                 SELECT ti.product_name as name, SUM(ti.quantity) as quantity, SUM(ti.price * ti.quantity) as revenue
                 FROM transaction_items ti
                 JOIN transactions t ON ti.transaction_id = t.id
-                WHERE date(t.timestamp) >= date('now', ?)
+                WHERE t.timestamp >= ?
                 GROUP BY ti.product_name
                 ORDER BY revenue DESC
                 LIMIT ?
             """
-            params = (f'-{int(days)} days', int(limit))
+            params = (days_ago(days), int(limit))
         else:
             sql = """
                 SELECT product_name as name, SUM(quantity) as quantity, SUM(price * quantity) as revenue
@@ -307,18 +491,29 @@ def get_top_products(limit=5, days=None):
 
 # ============== CONFIGURATION ==============
 
-TEMPLATES = {
+def _freeze(value):
+    if isinstance(value, dict):
+        return MappingProxyType({k: _freeze(v) for k, v in value.items()})
+    return value
+
+TEMPLATES = _freeze({
     'cafe': {'name': 'Café', 'icon': '☕', 'theme': {'primary': '#8B4513', 'accent': '#CD853F', 'bg': '#FFF8DC'}, 'taxRate': 8, 'currency': '$'},
     'retail': {'name': 'Retail', 'icon': '🏪', 'theme': {'primary': '#2563eb', 'accent': '#60a5fa', 'bg': '#eff6ff'}, 'taxRate': 10, 'currency': '$'},
     'restaurant': {'name': 'Restaurant', 'icon': '🍽️', 'theme': {'primary': '#dc2626', 'accent': '#f87171', 'bg': '#fef2f2'}, 'taxRate': 8, 'currency': '$'}
-}
+})
+
+_DEFAULT_THEME = TEMPLATES['cafe']['theme']
 
 PAYMENT_METHODS = ['Cash', 'Credit Card', 'Debit Card', 'Mobile Payment']
+PAGE_SIZE = 24
+
+def calculate_loyalty_points(total, rate=1):
+    return int(float(total) * float(rate))
 
 def init_session_state():
     defaults = {
         'screen': 'welcome',
-        'cart': [],
+        'cart': {},
         'setup_step': 1,
         'edit_product_id': None,
         'edit_customer_id': None,
@@ -331,13 +526,9 @@ def init_session_state():
 
 # ============== STYLING ==============
 
-def apply_styles(config):
-    theme = config.get('theme') if config else TEMPLATES['cafe']['theme']
-    primary = theme.get('primary', '#2563eb')
-    accent = theme.get('accent', '#60a5fa')
-    bg = theme.get('bg', '#f8fafc')
-
-    st.markdown(f"""
+@st.cache_data(show_spinner=False)
+def _build_styles(primary, accent, bg):
+    return f"""
     <style>
     @import url('https://fonts.googleapis.com/css2?family=Inter:wght@400;500;600;700&display=swap');
     * {{ font-family: 'Inter', sans-serif; }}
@@ -351,6 +542,8 @@ def apply_styles(config):
     }}
     .metric-card:hover {{ transform: translateY(-2px); box-shadow: 0 4px 16px rgba(0,0,0,0.12); }}
 
+    .card-grid {{ display: grid; gap: 1rem; }}
+
     .product-card {{
         background: white; padding: 1.25rem; border-radius: 12px; border: 2px solid #e5e7eb;
         transition: all 0.2s; height: 100%; cursor: pointer;
@@ -393,7 +586,12 @@ def apply_styles(config):
         transform: translateY(-1px); box-shadow: 0 4px 12px rgba(0,0,0,0.15);
     }}
     </style>
-    """, unsafe_allow_html=True)
+    """
+
+def apply_styles(config):
+    theme = (config.get('theme') if config else None) or _DEFAULT_THEME
+    css = _build_styles(theme.get('primary', '#2563eb'), theme.get('accent', '#60a5fa'), theme.get('bg', '#f8fafc'))
+    st.markdown(css, unsafe_allow_html=True)
 
 # ============== WELCOME SCREEN ==============
 
@@ -455,7 +653,7 @@ def setup_wizard():
                     config = {
                         'businessType': key,
                         'businessName': '',
-                        'theme': template['theme'],
+                        'theme': dict(template['theme']),
                         'taxRate': template['taxRate'],
                         'currency': template['currency'],
                         'enableInventory': True,
@@ -529,7 +727,7 @@ def header():
         """, unsafe_allow_html=True)
 
     with col2:
-        today_sales = TransactionDB.get_todays_total()
+        today_sales = TransactionDB.get_todays_summary()['total']
         currency = config.get('currency', '$')
         st.metric("Today's Sales", f"{currency}{today_sales:.2f}")
 
@@ -546,33 +744,24 @@ def header():
 
 def dashboard():
     config = ConfigDB.get() or {}
-    today_sales = TransactionDB.get_todays_total()
+    today = TransactionDB.get_todays_summary()
     stats = TransactionDB.get_stats(30)
-    products = ProductDB.get_all()
-
-    with get_db() as conn:
-        today_count = conn.execute("SELECT COUNT(*) as cnt FROM transactions WHERE date(timestamp) = date('now', 'localtime')").fetchone()['cnt'] or 0
 
     st.subheader("📊 Overview")
-    col1, col2, col3, col4 = st.columns(4)
 
     currency = config.get('currency', '$')
     metrics = [
-        ("Today", f"{currency}{today_sales:.2f}", f"{today_count} sales"),
+        ("Today", f"{currency}{today['total']:.2f}", f"{today['count']} sales"),
         ("30-Day", f"{currency}{stats['total_sales']:.2f}", f"{stats['transaction_count']} sales"),
         ("Avg Sale", f"{currency}{stats['avg_transaction']:.2f}", "Per transaction"),
-        ("Products", len(products), "In catalog")
+        ("Products", ProductDB.count(), "In catalog")
     ]
 
-    for col, (label, number, sub) in zip([col1, col2, col3, col4], metrics):
-        with col:
-            st.markdown(f"""
-            <div class='metric-card'>
-                <p class='stat-label'>{label}</p>
-                <p class='stat-number'>{number}</p>
-                <p class='stat-label'>{sub}</p>
-            </div>
-            """, unsafe_allow_html=True)
+    cards = "".join(
+        f"<div class='metric-card'><p class='stat-label'>{label}</p><p class='stat-number'>{number}</p><p class='stat-label'>{sub}</p></div>"
+        for label, number, sub in metrics
+    )
+    st.markdown(f"<div class='card-grid' style='grid-template-columns: repeat(4, 1fr);'>{cards}</div>", unsafe_allow_html=True)
 
     st.markdown("<br>", unsafe_allow_html=True)
 
@@ -591,221 +780,277 @@ def dashboard():
         st.subheader("🏆 Top Products")
         top = get_top_products(5, days=30)
         if top:
-            for i, p in enumerate(top, 1):
-                st.markdown(f"""
-                <div class='cart-item'>
-                    <strong>{i}. {p['name']}</strong><br>
-                    <span style='color: #6b7280;'>Sold: {p['quantity']} | {currency}{p['revenue']:.2f}</span>
-                </div>
-                """, unsafe_allow_html=True)
+            st.markdown("".join(
+                f"<div class='cart-item'><strong>{i}. {p['name']}</strong><br>"
+                f"<span style='color: #6b7280;'>Sold: {p['quantity']} | {currency}{p['revenue']:.2f}</span></div>"
+                for i, p in enumerate(top, 1)
+            ), unsafe_allow_html=True)
         else:
             st.info("No sales yet")
 
     with col2:
         st.subheader("⚠️ Inventory")
         if config.get('enableInventory'):
-            threshold = int(config.get('lowStockThreshold', 5))
-            low = [p for p in products if 0 < p.get('inventory', 0) <= threshold]
-            out = [p for p in products if p.get('inventory', 0) <= 0]
-
-            if out:
-                st.error(f"🚨 {len(out)} out of stock")
-                for p in out[:3]:
-                    st.markdown(f"• {p['name']}")
-            if low:
-                st.warning(f"⚡ {len(low)} low stock")
-                for p in low[:3]:
-                    st.markdown(f"• {p['name']} ({p['inventory']} left)")
-            if not low and not out:
+            alerts = ProductDB.get_stock_alerts(int(config.get('lowStockThreshold', 5)))
+
+            if alerts['out_count']:
+                st.error(f"🚨 {alerts['out_count']} out of stock")
+                st.markdown("  \n".join(f"• {p['name']}" for p in alerts['out']))
+            if alerts['low_count']:
+                st.warning(f"⚡ {alerts['low_count']} low stock")
+                st.markdown("  \n".join(f"• {p['name']} ({p['inventory']} left)" for p in alerts['low']))
+            if not alerts['low_count'] and not alerts['out_count']:
                 st.success("✅ All stocked")
         else:
             st.info("Enable in Settings")
 
 # ============== POS SCREEN ==============
 
-def pos_screen():
-    config = ConfigDB.get() or {}
+def paginate(items, key):
+    pages = max(1, -(-len(items) // PAGE_SIZE))
+    if pages == 1:
+        return items
+    # results may have shrunk since the page was picked
+    if st.session_state.get(key, 1) > pages:
+        st.session_state[key] = pages
+    page = st.number_input("Page", min_value=1, max_value=pages, step=1, key=key)
+    start = (int(page) - 1) * PAGE_SIZE
+    return items[start:start + PAGE_SIZE]
+
+def _product_card(product, config):
+    stock = int(product.get('inventory', 0))
+    in_stock = (stock > 0) or not config.get('enableInventory', True)
+    stock_class = ''
+    if not in_stock:
+        stock_class = 'out-of-stock'
+    elif in_stock and stock <= int(config.get('lowStockThreshold', 5)) and config.get('enableInventory', True):
+        stock_class = 'low-stock'
+
+    # badge
+    badge_html = ""
+    if config.get('enableInventory', True):
+        if stock == 0:
+            badge_html = f"<span class='badge badge-danger'>Stock: {stock}</span>"
+        elif stock <= int(config.get('lowStockThreshold', 5)):
+            badge_html = f"<span class='badge badge-warning'>Stock: {stock}</span>"
+        else:
+            badge_html = f"<span class='badge badge-success'>Stock: {stock}</span>"
+
+    return (
+        f"<div class='product-card {stock_class}'>"
+        f"<h4 style='margin: 0 0 0.5rem 0;'>{product['name']}</h4>"
+        f"<p style='color: #2563eb; font-size: 1.4rem; font-weight: 700; margin: 0.25rem 0;'>{config.get('currency', '$')}{product['price']:.2f}</p>"
+        f"{badge_html}"
+        "</div>"
+    )
+
+@st.fragment
+def _product_grid(config):
     products = ProductDB.get_all()
     cart = st.session_state.cart
 
-    col1, col2 = st.columns([2.5, 1.5])
+    search_col, cat_col = st.columns([3, 1])
+    with search_col:
+        search = st.text_input("🔍 Search...", key="search", placeholder="Type to search")
+    with cat_col:
+        categories = ['All'] + ProductDB.get_categories()
+        selected_cat = st.selectbox("", categories, label_visibility="collapsed", key="category_filter")
 
-    with col1:
-        search_col, cat_col = st.columns([3, 1])
-        with search_col:
-            search = st.text_input("🔍 Search...", key="search", placeholder="Type to search")
-        with cat_col:
-            categories = ['All'] + sorted({p.get('category', 'General') for p in products})
-            selected_cat = st.selectbox("", categories, label_visibility="collapsed", key="category_filter")
-
-        filtered = products
-        if search:
-            filtered = [p for p in filtered if search.lower() in p.get('name', '').lower()]
-        if selected_cat != 'All':
-            filtered = [p for p in filtered if p.get('category') == selected_cat]
-
-        if filtered:
-            for i in range(0, len(filtered), 3):
-                cols = st.columns(3)
-                for j, product in enumerate(filtered[i:i+3]):
-                    with cols[j]:
-                        stock = int(product.get('inventory', 0))
-                        in_stock = (stock > 0) or not config.get('enableInventory', True)
-                        stock_class = ''
-                        if not in_stock:
-                            stock_class = 'out-of-stock'
-                        elif in_stock and stock <= int(config.get('lowStockThreshold', 5)) and config.get('enableInventory', True):
-                            stock_class = 'low-stock'
-
-                        # badge
-                        badge_html = ""
-                        if config.get('enableInventory', True):
-                            if stock == 0:
-                                badge_html = f"<span class='badge badge-danger'>Stock: {stock}</span>"
-                            elif stock <= int(config.get('lowStockThreshold', 5)):
-                                badge_html = f"<span class='badge badge-warning'>Stock: {stock}</span>"
-                            else:
-                                badge_html = f"<span class='badge badge-success'>Stock: {stock}</span>"
-
-                        st.markdown(f"""
-                        <div class='product-card {stock_class}'>
-                            <h4 style='margin: 0 0 0.5rem 0;'>{product['name']}</h4>
-                            <p style='color: #2563eb; font-size: 1.4rem; font-weight: 700; margin: 0.25rem 0;'>
-                                {config.get('currency', '$')}{product['price']:.2f}
-                            </p>
-                            {badge_html}
-                        </div>
-                        """, unsafe_allow_html=True)
-
-                        if st.button("Add", key=f"add_{product['id']}", disabled=(not in_stock)):
+    filtered = ProductDB.search(search) if search else products
+    if selected_cat != 'All':
+        filtered = [p for p in filtered if p.get('category') == selected_cat]
+
+    if filtered:
+        visible = paginate(filtered, "pos_page")
+        cards = "".join(_product_card(product, config) for product in visible)
+        st.markdown(f"<div class='card-grid' style='grid-template-columns: repeat(3, 1fr);'>{cards}</div>", unsafe_allow_html=True)
+
+        track = config.get('enableInventory', True)
+        rows = []
+        for p in visible:
+            left = int(p.get('inventory', 0)) - (cart[p['id']]['cartQuantity'] if p['id'] in cart else 0)
+            # the editor can't lock single cells, so sold-out lines are left out instead
+            if track and left <= 0:
+                continue
+            rows.append({'id': p['id'], 'Product': p['name'], 'Price': float(p['price']), 'Left': left, 'Qty': 0})
+
+        notice = st.session_state.pop('stock_notice', None)
+        if notice:
+            st.warning(notice)
+
+        if rows:
+            with st.form("add_products", border=False):
+                edited = st.data_editor(
+                    rows, key="pos_qty", hide_index=True,
+                    column_order=['Product', 'Price', 'Left', 'Qty'] if track else ['Product', 'Price', 'Qty'],
+                    disabled=['Product', 'Price', 'Left'],
+                    column_config={'Qty': st.column_config.NumberColumn(min_value=0, step=1)}
+                )
+                if st.form_submit_button("Add Selected", type="primary"):
+                    by_id = {p['id']: p for p in visible}
+                    short = []
+                    for row in edited:
+                        qty = int(row['Qty'] or 0)
+                        product = by_id[row['id']]
+                        existing = cart.get(product['id'])
+                        if track and qty > row['Left']:
+                            # never put more in the cart than is on the shelf
+                            short.append(product['name'])
+                            qty = row['Left']
+                        if qty <= 0:
+                            continue
+                        if existing:
+                            existing['cartQuantity'] += qty
+                        else:
                             # normalize product snapshot stored in cart
-                            snapshot = {
+                            cart[product['id']] = {
                                 'id': product['id'],
                                 'name': product['name'],
                                 'price': float(product['price']),
-                                'cartQuantity': 1,
+                                'cartQuantity': qty,
                                 'inventory': int(product.get('inventory', 0))
                             }
-                            existing = next((c for c in cart if c['id'] == snapshot['id']), None)
-                            if existing:
-                                existing['cartQuantity'] += 1
-                            else:
-                                cart.append(snapshot)
-                            st.rerun()
+                    if short:
+                        st.session_state.stock_notice = f"Not enough stock, added what was left of: {', '.join(short)}"
+                    del st.session_state["pos_qty"]
+                    # full rerun so the cart panel picks up the change
+                    st.rerun()
         else:
-            st.info("No products found")
+            st.info("Everything on this page is sold out or already in the cart")
+    else:
+        st.info("No products found")
 
-    with col2:
-        st.markdown("<div class='cart-container'>", unsafe_allow_html=True)
-        st.markdown(f"### 🛒 Cart ({len(cart)})")
-
-        customers = []
-        selected_customer = 'Guest'
-        if config.get('enableCustomers', True):
-            customers = CustomerDB.get_all()
-            customer_opts = ['Guest'] + [c['name'] for c in customers]
-            selected_customer = st.selectbox("Customer", customer_opts)
-
-        if cart:
-            for item in list(cart):  # copy to avoid mutation issues during iteration
-                st.markdown(f"""
-                <div class='cart-item'>
-                    <strong>{item['name']}</strong><br>
-                    <div style='display: flex; justify-content: space-between; margin-top: 0.5rem;'>
-                        <span>{config.get('currency', '$')}{item['price']:.2f} × {item['cartQuantity']}</span>
-                        <strong style='color: #2563eb;'>{config.get('currency', '$')}{(item['price'] * item['cartQuantity']):.2f}</strong>
-                    </div>
-                </div>
-                """, unsafe_allow_html=True)
+def _update_cart(track_inventory):
+    cart = st.session_state.cart
+    lines = list(cart.values())
+    edits = st.session_state.get("cart_lines", {}).get("edited_rows", {})
+    short = []
+    for idx, change in edits.items():
+        item = lines[int(idx)]
+        qty = int(change.get('Qty', item['cartQuantity']) or 0)
+        if track_inventory and qty > item.get('inventory', 0):
+            short.append(item['name'])
+            qty = item.get('inventory', 0)
+        if change.get('Remove') or qty <= 0:
+            cart.pop(item['id'], None)
+        else:
+            item['cartQuantity'] = qty
+    if short:
+        st.session_state.cart_notice = f"Not enough stock, quantity set to what is left for: {', '.join(short)}"
+    del st.session_state["cart_lines"]
 
-                col_a, col_b, col_c = st.columns([1, 1, 1])
-                with col_a:
-                    if st.button("−", key=f"dec_{item['id']}"):
-                        item['cartQuantity'] -= 1
-                        if item['cartQuantity'] <= 0:
-                            cart.remove(item)
-                        st.rerun()
-                with col_b:
-                    if st.button("+", key=f"inc_{item['id']}"):
-                        # prevent adding beyond inventory when enabled
-                        if config.get('enableInventory', True) and item.get('inventory', 0) <= item['cartQuantity']:
-                            st.warning("Not enough stock")
-                        else:
-                            item['cartQuantity'] += 1
-                        st.rerun()
-                with col_c:
-                    if st.button("🗑️", key=f"del_{item['id']}"):
-                        cart.remove(item)
-                        st.rerun()
+def _clear_cart():
+    st.session_state.cart = {}
 
-            st.divider()
-            subtotal = sum(item['price'] * item['cartQuantity'] for item in cart)
-            tax = subtotal * (float(config.get('taxRate', 0)) / 100.0)
-            total = subtotal + tax
+@st.fragment
+def _cart_panel(config):
+    cart = st.session_state.cart
+    currency = config.get('currency', '$')
 
-            st.markdown(f"""
-            <div style='background: #f9fafb; padding: 1rem; border-radius: 8px;'>
-                <div style='display: flex; justify-content: space-between; margin-bottom: 0.5rem;'>
-                    <span>Subtotal:</span><span>{config.get('currency', '$')}{subtotal:.2f}</span>
-                </div>
-                <div style='display: flex; justify-content: space-between; margin-bottom: 0.5rem;'>
-                    <span>Tax ({config.get('taxRate', 0)}%):</span><span>{config.get('currency', '$')}{tax:.2f}</span>
-                </div>
-                <hr style='margin: 0.75rem 0; border-top: 2px solid #e5e7eb;'>
-                <div style='display: flex; justify-content: space-between;'>
-                    <strong style='font-size: 1.25rem;'>Total:</strong>
-                    <strong style='font-size: 1.5rem; color: #2563eb;'>{config.get('currency', '$')}{total:.2f}</strong>
-                </div>
-            </div>
-            """, unsafe_allow_html=True)
+    st.markdown("<div class='cart-container'>", unsafe_allow_html=True)
+    st.markdown(f"### 🛒 Cart ({len(cart)})")
+    notice = st.session_state.pop('cart_notice', None)
+    if notice:
+        st.warning(notice)
+
+    customer_ids = {}
+    selected_customer = 'Guest'
+    if config.get('enableCustomers', True):
+        # first entry wins for duplicate names, matching the dropdown
+        for cid, name in CustomerDB.names():
+            customer_ids.setdefault(name, cid)
+        selected_customer = st.selectbox("Customer", ['Guest'] + list(customer_ids))
+
+    if cart:
+        lines = "".join(
+            f"<tr><td>{item['name']}</td><td style='text-align: center;'>{currency}{item['price']:.2f} × {item['cartQuantity']}</td>"
+            f"<td style='text-align: right;'><strong style='color: #2563eb;'>{currency}{(item['price'] * item['cartQuantity']):.2f}</strong></td></tr>"
+            for item in cart.values()
+        )
+        st.markdown(f"<table style='width: 100%;'>{lines}</table>", unsafe_allow_html=True)
+
+        with st.form("cart_form", border=False):
+            st.data_editor(
+                [{'Item': item['name'], 'Qty': item['cartQuantity'], 'Remove': False} for item in cart.values()],
+                key="cart_lines", hide_index=True, disabled=['Item'],
+                column_config={'Qty': st.column_config.NumberColumn(min_value=0, step=1)}
+            )
+            # quantities are capped at stock when inventory is tracked
+            st.form_submit_button("Update Cart", on_click=_update_cart, args=(config.get('enableInventory', True),))
 
-            payment = st.selectbox("Payment", PAYMENT_METHODS)
+        st.divider()
+        subtotal = sum(item['price'] * item['cartQuantity'] for item in cart.values())
+        tax = subtotal * (float(config.get('taxRate', 0)) / 100.0)
+        total = subtotal + tax
 
-            col1, col2 = st.columns(2)
-            with col1:
-                if st.button("Clear"):
-                    st.session_state.cart = []
-                    st.rerun()
-            with col2:
-                if st.button("Complete"):
-                    customer_id = None
-                    if config.get('enableCustomers', True) and selected_customer != 'Guest':
-                        cust = next((c for c in customers if c['name'] == selected_customer), None)
-                        if cust:
-                            customer_id = cust['id']
-                            points = int(total) if config.get('enableLoyalty', True) else 0
-                            CustomerDB.update_stats(customer_id, total, points)
-
-                    transaction = {
-                        'id': str(uuid4()),
-                        'items': [{**item} for item in cart],
-                        'subtotal': subtotal,
-                        'discount': 0.0,
-                        'tax': tax,
-                        'tip': 0.0,
-                        'total': total,
-                        'payment_method': payment,
-                        'customer_id': customer_id,
-                        'timestamp': datetime.utcnow().isoformat()
-                    }
+        st.markdown(f"""
+        <div style='background: #f9fafb; padding: 1rem; border-radius: 8px;'>
+            <div style='display: flex; justify-content: space-between; margin-bottom: 0.5rem;'>
+                <span>Subtotal:</span><span>{currency}{subtotal:.2f}</span>
+            </div>
+            <div style='display: flex; justify-content: space-between; margin-bottom: 0.5rem;'>
+                <span>Tax ({config.get('taxRate', 0)}%):</span><span>{currency}{tax:.2f}</span>
+            </div>
+            <hr style='margin: 0.75rem 0; border-top: 2px solid #e5e7eb;'>
+            <div style='display: flex; justify-content: space-between;'>
+                <strong style='font-size: 1.25rem;'>Total:</strong>
+                <strong style='font-size: 1.5rem; color: #2563eb;'>{currency}{total:.2f}</strong>
+            </div>
+        </div>
+        """, unsafe_allow_html=True)
 
-                    TransactionDB.add(transaction)
-                    if config.get('enableInventory', True):
-                        for item in cart:
-                            ProductDB.update_inventory(item['id'], -int(item['cartQuantity']))
+        payment = st.selectbox("Payment", PAYMENT_METHODS)
 
-                    st.session_state.cart = []
-                    st.session_state.last_transaction = transaction
+        col1, col2 = st.columns(2)
+        with col1:
+            st.button("Clear", on_click=_clear_cart)
+        with col2:
+            if st.button("Complete"):
+                customer_id = None
+                points = 0
+                if selected_customer != 'Guest' and selected_customer in customer_ids:
+                    customer_id = customer_ids[selected_customer]
+                    points = calculate_loyalty_points(total, config.get('loyaltyRate', 1)) if config.get('enableLoyalty', True) else 0
+
+                transaction = {
+                    'id': str(uuid4()),
+                    'items': [{**item} for item in cart.values()],
+                    'subtotal': subtotal,
+                    'discount': 0.0,
+                    'tax': tax,
+                    'tip': 0.0,
+                    'total': total,
+                    'payment_method': payment,
+                    'customer_id': customer_id,
+                    'timestamp': datetime.utcnow().isoformat()
+                }
+
+                try:
+                    TransactionDB.process_sale(transaction, config.get('enableInventory', True), points)
+                except ValueError as e:
+                    st.error(str(e))
+                else:
+                    st.session_state.cart = {}
+                    st.session_state.last_transaction = {k: transaction[k] for k in ('id', 'total', 'timestamp')}
                     st.success("✅ Sale complete!")
                     st.rerun()
-        else:
-            st.info("Cart is empty")
-        st.markdown("</div>", unsafe_allow_html=True)
+    else:
+        st.info("Cart is empty")
+    st.markdown("</div>", unsafe_allow_html=True)
+
+def pos_screen():
+    config = ConfigDB.get() or {}
+    col1, col2 = st.columns([2.5, 1.5])
+    with col1:
+        _product_grid(config)
+    with col2:
+        _cart_panel(config)
 
 # ============== PRODUCTS SCREEN ==============
 
 def products_screen():
     config = ConfigDB.get() or {}
+    currency = config.get('currency', '$')
     products = ProductDB.get_all()
 
     col1, col2 = st.columns([3, 1])
@@ -822,7 +1067,8 @@ def products_screen():
 
         with st.form("product_form"):
             st.subheader("Add Product" if is_new else "Edit Product")
-            data = {}
+            # start from the stored record so fields the form doesn't show survive the save
+            data = dict(edit)
             col1, col2 = st.columns(2)
             with col1:
                 data['name'] = st.text_input("Name *", value=edit.get('name', ''))
@@ -852,13 +1098,13 @@ def products_screen():
                         st.error("Name and price required")
 
     search = st.text_input("🔍 Search products...", key="product_search")
-    filtered = [p for p in products if not search or search.lower() in p.get('name', '').lower()]
+    filtered = ProductDB.search(search) if search else products
 
     if filtered:
-        for p in filtered:
+        for p in paginate(filtered, "products_page"):
             col1, col2, col3, col4 = st.columns([3, 1, 1, 2])
             with col1:
-                st.markdown(f"**{p['name']}** - {config.get('currency', '$')}{p['price']:.2f}")
+                st.markdown(f"**{p['name']}** - {currency}{p['price']:.2f}")
             with col2:
                 if config.get('enableInventory', True):
                     st.write(f"Stock: {p.get('inventory', 0)}")
@@ -879,6 +1125,7 @@ def products_screen():
 
 def customers_screen():
     config = ConfigDB.get() or {}
+    currency = config.get('currency', '$')
     customers = CustomerDB.get_all()
 
     if not config.get('enableCustomers', True):
@@ -895,11 +1142,11 @@ def customers_screen():
 
     if st.session_state.get('edit_customer_id'):
         is_new = st.session_state.edit_customer_id == 'new'
-        edit = {} if is_new else (next((c for c in customers if c['id'] == st.session_state.edit_customer_id), {}))
+        edit = {} if is_new else CustomerDB.get_by_id(st.session_state.edit_customer_id) or {}
 
         with st.form("customer_form"):
             st.subheader("Add Customer" if is_new else "Edit Customer")
-            data = {}
+            data = dict(edit)
             data['name'] = st.text_input("Name *", value=edit.get('name', ''))
             col1, col2 = st.columns(2)
             with col1:
@@ -934,7 +1181,7 @@ def customers_screen():
                 if c.get('email'):
                     st.caption(c['email'])
             with col2:
-                st.caption(f"Spent: {config.get('currency', '$')}{c.get('total_spend', 0):.2f}")
+                st.caption(f"Spent: {currency}{c.get('total_spend', 0):.2f}")
                 if config.get('enableLoyalty', True):
                     st.caption(f"Points: {c.get('loyalty_points', 0)}")
             with col3:
@@ -948,7 +1195,9 @@ def customers_screen():
 # ============== ANALYTICS SCREEN ==============
 
 def analytics_screen():
+    import pandas as pd
     config = ConfigDB.get() or {}
+    currency = config.get('currency', '$')
     st.subheader("📈 Analytics")
 
     time_range = st.selectbox("Period", ["Last 7 Days", "Last 30 Days", "Last 90 Days"])
@@ -961,11 +1210,11 @@ def analytics_screen():
 
     col1, col2, col3, col4 = st.columns(4)
     with col1:
-        st.metric("Revenue", f"{config.get('currency', '$')}{stats['total_sales']:.2f}")
+        st.metric("Revenue", f"{currency}{stats['total_sales']:.2f}")
     with col2:
         st.metric("Transactions", stats['transaction_count'])
     with col3:
-        st.metric("Avg Sale", f"{config.get('currency', '$')}{stats['avg_transaction']:.2f}")
+        st.metric("Avg Sale", f"{currency}{stats['avg_transaction']:.2f}")
     with col4:
         st.metric("Items Sold", stats['total_items_sold'])
 
@@ -974,19 +1223,15 @@ def analytics_screen():
 
     with col1:
         st.subheader("Top Products")
-        top = get_top_products(10, days=days)
-        for i, p in enumerate(top, 1):
-            st.write(f"{i}. **{p['name']}** - {p['quantity']} sold - {config.get('currency', '$')}{p['revenue']:.2f}")
+        top = pd.DataFrame(get_top_products(10, days=days), columns=['name', 'quantity', 'revenue'])
+        top.columns = ['Product', 'Sold', f"Revenue ({currency})"]
+        st.dataframe(top.round(2), hide_index=True)
 
     with col2:
         st.subheader("Payment Methods")
-        with get_db() as conn:
-            results = conn.execute(
-                "SELECT payment_method, SUM(total) as total FROM transactions WHERE date(timestamp) >= date('now', ?) GROUP BY payment_method ORDER BY total DESC",
-                (f'-{int(days)} days',)
-            ).fetchall()
-            for r in results:
-                st.write(f"**{r['payment_method']}:** {config.get('currency', '$')}{float(r['total'] or 0):.2f}")
+        payments = pd.DataFrame(TransactionDB.get_payment_totals(days), columns=['payment_method', 'total'])
+        payments.columns = ['Method', f"Total ({currency})"]
+        st.dataframe(payments.round(2), hide_index=True)
 
 # ============== SETTINGS SCREEN ==============
 
@@ -1011,12 +1256,23 @@ def settings_screen():
 
 # ============== MAIN ==============
 
+_PAGE_CFG = dict(page_title="POS Pro", page_icon="🏪", layout="wide", initial_sidebar_state="collapsed")
+
+_SCREENS = {
+    'dashboard': dashboard,
+    'pos': pos_screen,
+    'products': products_screen,
+    'customers': customers_screen,
+    'analytics': analytics_screen,
+    'settings': settings_screen
+}
+
 def main():
-    st.set_page_config(page_title="POS Pro", page_icon="🏪", layout="wide", initial_sidebar_state="collapsed")
-    init_database()
+    st.set_page_config(**_PAGE_CFG)
+    ensure_database(DB_NAME)
     init_session_state()
     config = ConfigDB.get()
-    apply_styles(config or TEMPLATES['cafe'])
+    apply_styles(config)
 
     if st.session_state.screen == 'welcome' or not config:
         welcome_screen()
@@ -1024,16 +1280,8 @@ def main():
         setup_wizard()
     else:
         header()
-        screens = {
-            'dashboard': dashboard,
-            'pos': pos_screen,
-            'products': products_screen,
-            'customers': customers_screen,
-            'analytics': analytics_screen,
-            'settings': settings_screen
-        }
-        func = screens.get(st.session_state.screen, dashboard)
-        func()
+        _SCREENS.get(st.session_state.screen, dashboard)()
+    optimize_database(DB_NAME)
 
 if __name__ == "__main__":
     main()